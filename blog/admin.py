@@ -1,5 +1,5 @@
 from django.contrib import admin
-from blog.models import Post, Comment
+from blog.models import Post, Comment, ArchivedComment
 
 
 @admin.register(Post)
@@ -18,3 +18,15 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'post', 'created', 'active']
     list_filter = ['active', 'created', 'updated']
     search_fields = ['name', 'eamil', 'body']
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(admin.ModelAdmin):
+    list_display = ['name', 'email', 'post', 'created', 'archived', 'active']
+    list_filter = ['active', 'created', 'archived']
+    search_fields = ['name', 'email', 'body']
+    raw_id_fields = ['post']
+
+    def has_add_permission(self, request):
+        # Rows only come from archive_comments, which keeps Post.archived_comments_count in step
+        return False
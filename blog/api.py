@@ -0,0 +1,239 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.views.decorators.http import require_GET
+
+from .models import Post, Comment, ArchivedComment
+
+# Public field name -> ORM lookup used in the .values() projection
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'author': 'author__username',
+    'body': 'body',
+    'publish': 'publish',
+    'updated': 'updated',
+}
+# Fields computed after the projection (no extra column needed)
+POST_EXTRA_FIELDS = ['url', 'tags']
+POST_DEFAULT_FIELDS = ['id', 'title', 'slug', 'author', 'publish', 'url', 'tags']
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'body': 'body',
+    'created': 'created',
+}
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _error(exc):
+    return JsonResponse({'error': exc.message}, status=exc.status)
+
+
+def _json_response(request, data):
+    """ Serialize data and answer 304 when the client already has it. """
+    content = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    etag = quote_etag(hashlib.md5(content.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def _requested_fields(request, allowed, default):
+    """ Parse the ?fields=a,b sparse fieldset parameter. """
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _encode_cursor(value, pk):
+    raw = f'{value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(value), int(pk)
+    except (ValueError, UnicodeError):
+        raise ApiError('Invalid cursor')
+
+
+def _paginate(request, querysets, lookups, order_field, descending):
+    """
+    Keyset (cursor) pagination over (order_field, id) of one or more
+    querysets with the same columns, combined with UNION ALL.
+    Returns the projected rows for this page and the next cursor.
+    """
+    cursor = request.GET.get('cursor')
+    op = 'lt' if descending else 'gt'
+    if cursor:
+        value, pk = _decode_cursor(cursor)
+        querysets = [qs.filter(Q(**{f'{order_field}__{op}': value}) |
+                               Q(**{order_field: value, f'id__{op}': pk}))
+                     for qs in querysets]
+    # The ordering columns are always projected so the cursor can be built
+    columns = sorted(set(lookups) | {'id', order_field})
+    # Parts of a UNION cannot carry their own (Meta) ordering
+    queryset, *others = [qs.values(*columns).order_by() for qs in querysets]
+    if others:
+        queryset = queryset.union(*others, all=True)
+    prefix = '-' if descending else ''
+    queryset = queryset.order_by(f'{prefix}{order_field}', f'{prefix}id')
+    limit = _limit(request)
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last[order_field], last['id'])
+    return rows, next_cursor
+
+
+def _next_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def _tags_by_post(post_ids):
+    """ Map post id -> list of tag names with a single query. """
+    tags = {pk: [] for pk in post_ids}
+    items = Post.tags.through.objects.filter(
+        content_type__app_label=Post._meta.app_label,
+        content_type__model=Post._meta.model_name,
+        object_id__in=post_ids).order_by('tag__name').values_list('object_id', 'tag__name')
+    for object_id, name in items:
+        tags[object_id].append(name)
+    return tags
+
+
+def _serialize_posts(rows, fields):
+    """ Build post dicts from projected rows, keeping only the requested fields. """
+    tags = _tags_by_post([row['id'] for row in rows]) if 'tags' in fields else {}
+    items = []
+    for row in rows:
+        item = {}
+        for field in fields:
+            if field == 'url':
+                publish = row['publish']
+                item['url'] = reverse('blog:post_detail',
+                                      args=[publish.year, publish.month,
+                                            publish.day, row['slug']])
+            elif field == 'tags':
+                item['tags'] = tags[row['id']]
+            else:
+                item[field] = row[POST_FIELDS[field]]
+        items.append(item)
+    return items
+
+
+def _post_lookups(fields):
+    lookups = [POST_FIELDS[f] for f in fields if f in POST_FIELDS]
+    if 'url' in fields:
+        lookups += ['publish', 'slug']
+    return lookups
+
+
+@require_GET
+def post_list(request):
+    """ List published posts, newest first. """
+    try:
+        fields = _requested_fields(request,
+                                   list(POST_FIELDS) + POST_EXTRA_FIELDS,
+                                   POST_DEFAULT_FIELDS)
+        queryset = Post.published.all()
+        tag_slug = request.GET.get('tag')
+        if tag_slug:
+            queryset = queryset.filter(tags__slug=tag_slug)
+        rows, cursor = _paginate(request, [queryset], _post_lookups(fields),
+                                 'publish', descending=True)
+    except ApiError as exc:
+        return _error(exc)
+    return _json_response(request, {'results': _serialize_posts(rows, fields),
+                                    'next': _next_url(request, cursor)})
+
+
+@require_GET
+def post_detail(request, post_id):
+    """ A single published post. """
+    try:
+        fields = _requested_fields(request,
+                                   list(POST_FIELDS) + POST_EXTRA_FIELDS,
+                                   list(POST_FIELDS) + POST_EXTRA_FIELDS)
+    except ApiError as exc:
+        return _error(exc)
+    lookups = set(_post_lookups(fields)) | {'id'}
+    rows = list(Post.published.filter(id=post_id).values(*lookups))
+    if not rows:
+        return _error(ApiError('Not found', status=404))
+    return _json_response(request, _serialize_posts(rows, fields)[0])
+
+
+@require_GET
+def comment_list(request, post_id):
+    """ Active comments of a published post, oldest first, archived ones included. """
+    if not Post.published.filter(id=post_id).exists():
+        return _error(ApiError('Not found', status=404))
+    try:
+        fields = _requested_fields(request, COMMENT_FIELDS, COMMENT_FIELDS)
+        querysets = [ArchivedComment.objects.filter(post_id=post_id, active=True),
+                     Comment.objects.filter(post_id=post_id, active=True)]
+        rows, cursor = _paginate(request, querysets,
+                                 [COMMENT_FIELDS[f] for f in fields],
+                                 'created', descending=False)
+    except ApiError as exc:
+        return _error(exc)
+    results = [{f: row[COMMENT_FIELDS[f]] for f in fields} for row in rows]
+    return _json_response(request, {'results': results,
+                                    'next': _next_url(request, cursor)})
+
+
+@require_GET
+def tag_list(request):
+    """ Tags used by published posts with their post counts. """
+    rows = Post.tags.through.objects.filter(
+        content_type__app_label=Post._meta.app_label,
+        content_type__model=Post._meta.model_name,
+        object_id__in=Post.published.values('id'),
+    ).values('tag__name', 'tag__slug').annotate(posts=Count('id')).order_by('tag__name')
+    results = [{'name': row['tag__name'],
+                'slug': row['tag__slug'],
+                'posts': row['posts']} for row in rows]
+    return _json_response(request, {'results': results})
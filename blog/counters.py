@@ -0,0 +1,140 @@
+import atexit
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import Case, F, When
+from django.urls import reverse
+
+from .models import Post
+from .suggest import suggestions
+
+
+class ViewCounter:
+    """
+    Collects post views in process memory and writes them to the database
+    in one UPDATE per batch instead of one UPDATE per request.
+    A batch is flushed when it holds `flush_threshold` views, by a timer
+    `flush_interval` seconds after its first view, so an idle worker does
+    not keep it, and at interpreter exit. A crash loses at most one batch.
+    Hits are only written to the database that was configured when they were
+    counted, so a batch from a test run is dropped rather than written to
+    whatever database is configured at exit.
+    Set `enabled` to False to ignore hits altogether, e.g. in tests.
+    """
+    ranking_key = 'blog:most_read'
+    ranking_size = 10
+    flush_interval = 10
+    flush_threshold = 100
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._count = 0
+        self._paused = False
+        self._database = None
+        self._timer = None
+
+    @contextmanager
+    def paused(self):
+        """ Ignore hits, e.g. while warming caches with synthetic requests. """
+        self._paused = True
+        try:
+            yield
+        finally:
+            self._paused = False
+
+    def hit(self, post_id):
+        if self._paused or not self.enabled:
+            return
+        with self._lock:
+            if not self._pending:
+                self._database = self._database_name()
+                self._timer = threading.Timer(self.flush_interval, self._flush_in_thread)
+                self._timer.daemon = True
+                self._timer.start()
+            self._pending[post_id] = self._pending.get(post_id, 0) + 1
+            self._count += 1
+            due = self._count >= self.flush_threshold
+        if due:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def discard(self):
+        """ Drop buffered views without writing them. """
+        with self._lock:
+            self._pending = {}
+            self._count = 0
+            self._database = None
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def flush(self):
+        """ Write buffered views to the database and refresh the ranking. """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            database, self._database = self._database, None
+            timer, self._timer = self._timer, None
+            self._count = 0
+        if timer is not None:
+            timer.cancel()
+        if not pending or database != self._database_name():
+            return 0
+        Post.objects.filter(id__in=pending).update(
+            views=Case(*[When(id=post_id, then=F('views') + count)
+                         for post_id, count in pending.items()]))
+        suggestions.add_views(pending)
+        self.update_ranking()
+        return len(pending)
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own database connection
+            connections.close_all()
+
+    @staticmethod
+    def _database_name():
+        return connections[router.db_for_write(Post)].settings_dict['NAME']
+
+    def update_ranking(self):
+        """ Store the most read published posts so templates need no query. """
+        rows = Post.published.filter(views__gt=0) \
+            .order_by('-views', '-publish') \
+            .values('id', 'title', 'slug', 'publish', 'views')[:self.ranking_size]
+        ranking = [{'id': row['id'],
+                    'title': row['title'],
+                    'views': row['views'],
+                    'url': reverse('blog:post_detail',
+                                   args=[row['publish'].year,
+                                         row['publish'].month,
+                                         row['publish'].day,
+                                         row['slug']])}
+                   for row in rows]
+        cache.set(self.ranking_key, ranking, None)
+        return ranking
+
+    def ranking(self, count):
+        ranking = cache.get(self.ranking_key)
+        if ranking is None:
+            ranking = self.update_ranking()
+        return ranking[:count]
+
+
+view_counter = ViewCounter()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        # The database may already be gone during shutdown
+        pass
@@ -1,4 +1,3 @@
-import markdown
 from django.contrib.syndication.views import Feed
 from django.template.defaultfilters import truncatewords_html
 from django.urls import reverse_lazy
@@ -18,6 +17,8 @@ class LatestPostsFeed(Feed):
         return item.title
 
     def item_description(self, item):
+        # Imported on first use to keep worker startup light
+        import markdown
         return truncatewords_html(markdown.markdown(item.body), 30)
 
     def item_pubdate(self, item):
@@ -0,0 +1,43 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+
+from blog.models import Post, Comment, ArchivedComment
+
+FIELDS = ['id', 'post_id', 'name', 'email', 'body', 'created', 'updated', 'active']
+
+
+class Command(BaseCommand):
+    help = 'Move inactive and old comments to the archive table in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365,
+                            help='Archive active comments older than this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        cold = Q(active=False) | Q(created__lt=cutoff)
+        moved = 0
+        while True:
+            # Each batch is copied and deleted in its own transaction
+            with transaction.atomic():
+                rows = list(Comment.objects.select_for_update()
+                            .filter(cold).order_by('id')
+                            .values(*FIELDS)[:options['batch_size']])
+                if not rows:
+                    break
+                ArchivedComment.objects.bulk_create(ArchivedComment(**row) for row in rows)
+                Comment.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                per_post = Counter(row['post_id'] for row in rows)
+                Post.objects.filter(id__in=per_post).update(
+                    archived_comments_count=Case(
+                        *[When(id=post_id, then=F('archived_comments_count') + count)
+                          for post_id, count in per_post.items()]))
+            moved += len(rows)
+            self.stdout.write(f'Archived {moved} comments', ending='\r')
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} comments'))
@@ -0,0 +1,73 @@
+import json
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from blog import api
+from blog.models import Post
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare per-item cost of the JSON API against rendering the list template.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200,
+                            help='Number of synthetic posts to create (rolled back afterwards).')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options['posts'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, count, repeat):
+        user = User.objects.create_user(username='benchmark-api-user')
+        posts = Post.objects.bulk_create(
+            Post(title=f'Benchmark post {i}', slug=f'benchmark-post-{i}',
+                 body='Lorem *ipsum* dolor sit amet. ' * 20, author=user,
+                 status=Post.Status.PUBLISHED)
+            for i in range(count))
+        for post in posts[:count // 2]:
+            post.tags.add('benchmark', f'tag-{post.id % 10}')
+        request = RequestFactory().get('/')
+
+        def serialize():
+            fields = api.POST_DEFAULT_FIELDS
+            rows = list(Post.published.values(*api._post_lookups(fields) + ['id'])[:count])
+            return json.dumps(api._serialize_posts(rows, fields), cls=DjangoJSONEncoder)
+
+        def render():
+            # Tags and authors are prefetched so both sides fetch related rows in bulk
+            posts = Post.published.select_related('author').prefetch_related('tags')
+            page = Paginator(posts, count).page(1)
+            return render_to_string('blog/post/list.html',
+                                    {'posts': page, 'tags': [], 'match_all': True}, request)
+
+        self.stdout.write(f'{count} posts, {repeat} runs each')
+        for name, func in [('json api (values)', serialize),
+                           ('template (list.html)', render)]:
+            func()  # warm up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            elapsed = (time.perf_counter() - start) / repeat
+            tracemalloc.start()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(f'{name:<22} {elapsed * 1e6 / count:10.1f} us/item '
+                              f'{peak / count:10.0f} B/item peak')
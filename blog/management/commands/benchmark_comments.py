@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import Post, Comment
+from blog.templatetags.blog_tags import get_most_commented_post
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure hot-path comment queries as comment volume grows, before and after archiving.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--volumes', default='1000,10000,50000',
+                            help='Comma separated total comment counts.')
+        parser.add_argument('--posts', type=int, default=50)
+        parser.add_argument('--recent', type=float, default=0.1,
+                            help='Share of comments that are recent and active.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"comments":>10} {"hot":>8} {"detail before":>15} {"detail after":>14} '
+                          f'{"sidebar before":>16} {"sidebar after":>15}')
+        for volume in [int(v) for v in options['volumes'].split(',')]:
+            try:
+                with transaction.atomic():
+                    self._run(volume, options)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def _run(self, volume, options):
+        user = User.objects.create_user(username='benchmark-comments-user')
+        posts = Post.objects.bulk_create(
+            Post(title=f'Benchmark post {i}', slug=f'benchmark-post-{i}', body='Body',
+                 author=user, status=Post.Status.PUBLISHED)
+            for i in range(options['posts']))
+        comments = Comment.objects.bulk_create(
+            Comment(post=posts[i % len(posts)], name='Name', email='name@example.com',
+                    body='Comment body', active=i % 5 != 0)
+            for i in range(volume))
+        # Everything but the most recent share is old
+        recent = int(volume * options['recent'])
+        old = [c.id for c in comments[:volume - recent]]
+        Comment.objects.filter(id__in=old).update(created=timezone.now() - timedelta(days=400))
+        post = posts[0]
+
+        def detail():
+            return Post.objects.get(id=post.id).active_comments()
+
+        def sidebar():
+            return list(get_most_commented_post())
+
+        before = [self._time(detail, options['repeat']), self._time(sidebar, options['repeat'])]
+        call_command('archive_comments', days=365, stdout=StringIO())
+        after = [self._time(detail, options['repeat']), self._time(sidebar, options['repeat'])]
+        self.stdout.write(f'{volume:>10} {Comment.objects.count():>8} '
+                          f'{before[0]:>12.2f} ms {after[0]:>11.2f} ms '
+                          f'{before[1]:>13.2f} ms {after[1]:>12.2f} ms')
+
+    @staticmethod
+    def _time(func, repeat):
+        func()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) * 1000 / repeat
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from blog.ratelimit import RateLimiter, RateLimitMiddleware, client_key, ratelimit
+
+BENCHMARK_CACHE = 'ratelimit-benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request overhead of the rate limiter.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000)
+        parser.add_argument('--clients', type=int, default=1000,
+                            help='Number of distinct client IPs.')
+        parser.add_argument('--cache', default=None,
+                            help='Cache alias for the shared bucket measurement '
+                                 '(defaults to a private local-memory cache).')
+
+    def handle(self, *args, **options):
+        if options['cache']:
+            self._run(options)
+            return
+        # Keep the synthetic buckets out of the caches the site uses
+        caches = {**settings.CACHES, BENCHMARK_CACHE: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': BENCHMARK_CACHE,
+        }}
+        with override_settings(CACHES=caches):
+            self._run({**options, 'cache': BENCHMARK_CACHE})
+
+    def _run(self, options):
+        total = options['requests']
+        factory = RequestFactory()
+        url = reverse('blog:post_search')
+        requests = [factory.get(url, REMOTE_ADDR=f'10.0.{i // 256 % 256}.{i % 256}')
+                    for i in range(options['clients'])]
+        for request in requests:
+            request.resolver_match = resolve(url)
+        # A rate no client reaches, so every request does the full allowed path
+        rate = f'{total}/s'
+
+        local = RateLimiter()
+        shared = RateLimiter(options['cache'])
+
+        def ok(request):
+            return HttpResponse()
+
+        decorated = ratelimit(rate)(ok)
+        middleware = RateLimitMiddleware(ok)
+
+        cases = [
+            ('local bucket', lambda r: local.consume('bench', client_key(r), rate)),
+            (f'cache bucket ({options["cache"]})',
+             lambda r: shared.consume('bench', client_key(r), rate)),
+            ('decorator', decorated),
+            ('middleware', lambda r: middleware.process_view(r, ok, (), {})),
+            ('baseline view', ok),
+        ]
+        self.stdout.write(f'{total} requests from {len(requests)} clients')
+        # The configured limit would send most requests down the 429 path
+        limits = {'blog:post_search': {'rate': rate, 'key': 'ip'}}
+        for name, func in cases:
+            with override_settings(BLOG_RATE_LIMITS=limits):
+                start = time.perf_counter()
+                for i in range(total):
+                    func(requests[i % len(requests)])
+                elapsed = time.perf_counter() - start
+            self.stdout.write(f'  {name:<36} {elapsed * 1e6 / total:8.2f} us/request')
@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is already imported
+SCRIPT = """
+import json, os, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urlconf = time.perf_counter()
+if os.getenv('DJANGO_PRELOAD'):
+    from config.preload import preload
+    preload()
+preloaded = time.perf_counter()
+from django.test import Client
+from django.urls import reverse
+status = Client(HTTP_HOST='localhost').get(reverse('blog:post_list')).status_code
+first_request = time.perf_counter()
+print(json.dumps({'setup': setup - start,
+                  'urlconf': urlconf - setup,
+                  'preload': preloaded - urlconf,
+                  'first_request': first_request - preloaded,
+                  'status': status}))
+"""
+
+STEPS = ['setup', 'urlconf', 'preload', 'first_request']
+
+
+class Command(BaseCommand):
+    help = 'Measure worker startup: django.setup(), URLconf import and first request latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15,
+                            help='Number of top-level imports to list.')
+        parser.add_argument('--preload', action='store_true',
+                            help='Call config.preload.preload() before the first request.')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR),
+                                                          env.get('PYTHONPATH')]))
+        if options['preload']:
+            env['DJANGO_PRELOAD'] = '1'
+        else:
+            env.pop('DJANGO_PRELOAD', None)
+
+        timings = defaultdict(list)
+        imports = defaultdict(list)
+        for _ in range(options['runs']):
+            result = subprocess.run([sys.executable, '-X', 'importtime', '-c', SCRIPT],
+                                    env=env, cwd=settings.BASE_DIR,
+                                    capture_output=True, text=True)
+            if result.returncode:
+                raise CommandError(result.stderr.strip().splitlines()[-1])
+            run = json.loads(result.stdout.strip().splitlines()[-1])
+            for step in STEPS:
+                timings[step].append(run[step])
+            for module, cumulative in self.parse_importtime(result.stderr).items():
+                imports[module].append(cumulative)
+
+        self.stdout.write(f'{options["runs"]} runs, preload {"on" if options["preload"] else "off"}')
+        for step in STEPS:
+            values = sorted(timings[step])
+            self.stdout.write(f'  {step:<15} median {values[len(values) // 2] * 1000:8.1f} ms '
+                              f'min {values[0] * 1000:8.1f} ms')
+        self.stdout.write(f'Top {options["top"]} top-level imports (median cumulative):')
+        medians = {module: sorted(values)[len(values) // 2]
+                   for module, values in imports.items()}
+        for module, us in sorted(medians.items(), key=lambda i: -i[1])[:options['top']]:
+            self.stdout.write(f'  {us / 1000:8.1f} ms  {module}')
+
+    @staticmethod
+    def parse_importtime(output):
+        """ Cumulative import time of each top-level import. """
+        modules = defaultdict(int)
+        for line in output.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # Nested imports are indented and already included in their parent
+            if name.startswith('  '):
+                continue
+            modules[name.strip()] += int(cumulative)
+        return modules
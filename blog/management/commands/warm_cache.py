@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, F
+from django.test import Client
+from django.urls import reverse
+
+from blog.counters import view_counter
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Render the most requested blog pages once so their caches are warm after a deploy. '
+            'Needs a cache shared with the web workers (e.g. file-based, Redis or Memcached).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=3,
+                            help='Number of post list pages to warm.')
+        parser.add_argument('--posts', type=int, default=20,
+                            help='Number of newest and of most commented posts to warm.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Maximum number of concurrent requests.')
+        parser.add_argument('--host', default=None,
+                            help='Host header to send (defaults to the first ALLOWED_HOSTS entry).')
+
+    def handle(self, *args, **options):
+        backend = caches['default']
+        if isinstance(backend, (LocMemCache, DummyCache)):
+            # Whatever this process caches is gone when the command exits
+            raise CommandError(f'The default cache ({type(backend).__name__}) is not shared '
+                               f'with the web workers, warming it would have no effect.')
+        host = options['host'] or self._default_host()
+        urls = self.collect_urls(options['pages'], options['posts'])
+        total = sum(len(group) for group in urls.values())
+        self.stdout.write(f'Warming {total} URLs with {options["workers"]} workers')
+
+        start = time.perf_counter()
+        # Synthetic requests must not count as post views
+        with view_counter.paused(), \
+                ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            results = {kind: list(pool.map(lambda url: self._fetch(url, host), group))
+                       for kind, group in urls.items()}
+        elapsed = time.perf_counter() - start
+
+        warmed = 0
+        for kind, statuses in results.items():
+            ok = sum(1 for status in statuses if status == 200)
+            warmed += ok
+            self.stdout.write(f'  {kind:<10} {ok}/{len(statuses)}')
+            for url, status in zip(urls[kind], statuses):
+                if status != 200:
+                    self.stderr.write(f'  {status} {url}')
+        published = Post.published.count()
+        posts = len(urls['posts'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {warmed}/{total} URLs in {elapsed:.2f}s, '
+            f'{posts}/{published} published posts covered'))
+
+    def collect_urls(self, pages, posts):
+        """ URLs to warm grouped by kind, without duplicates. """
+        list_url = reverse('blog:post_list')
+        newest = list(Post.published.all()[:posts])
+        most_commented = Post.published.annotate(
+            total_comments=Count('comments') + F('archived_comments_count')
+        ).order_by('-total_comments')[:posts]
+        post_urls = dict.fromkeys(post.get_absolute_url()
+                                  for post in newest + list(most_commented))
+        tag_slugs = Post.published.exclude(tags=None) \
+            .order_by('tags__slug').values_list('tags__slug', flat=True).distinct()
+        return {
+            'lists': [list_url] + [f'{list_url}?page={n}' for n in range(2, pages + 1)],
+            'tags': [reverse('blog:post_list_by_tag', args=[slug]) for slug in tag_slugs],
+            'posts': list(post_urls),
+            'feeds': [reverse('blog:post_feed'),
+                      reverse('django.contrib.sitemaps.views.sitemp')],
+        }
+
+    def _fetch(self, url, host):
+        try:
+            return Client(HTTP_HOST=host).get(url).status_code
+        finally:
+            # Each worker thread opens its own database connection
+            connection.close()
+
+    def _default_host(self):
+        hosts = [h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*']
+        return hosts[0] if hosts else 'localhost'
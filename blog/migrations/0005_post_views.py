@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_tags_alter_comment_post'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-19 05:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=80)),
+                ('email', models.EmailField(max_length=254)),
+                ('body', models.TextField()),
+                ('created', models.DateTimeField()),
+                ('updated', models.DateTimeField()),
+                ('active', models.BooleanField(default=True)),
+                ('archived', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to='blog.post')),
+            ],
+            options={
+                'ordering': ['created'],
+                'indexes': [models.Index(fields=['created'], name='blog_archiv_created_cee357_idx')],
+            },
+        ),
+    ]
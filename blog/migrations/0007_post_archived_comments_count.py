@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 05:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_archivedcomment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='archived_comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import models, router
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.urls import reverse
@@ -11,6 +15,66 @@ class PublishedManager(models.Manager):
             .filter(status=Post.Status.PUBLISHED)
 
 
+class CachedPostManager(models.Manager):
+    """
+    Read-through cache for single post lookups.
+    Rows are stored together with the author and tag names under keys that
+    embed a generation, so bumping the generation invalidates them all.
+    Generations are random rather than counters: if the key is evicted, a
+    counter would restart and make older rows valid again.
+    """
+    generation_key = 'blog:post:generation'
+    timeout = 60 * 15
+
+    def generation(self):
+        return cache.get_or_set(self.generation_key, self._new_generation, None)
+
+    def bump_generation(self):
+        generation = self._new_generation()
+        cache.set(self.generation_key, generation, None)
+        return generation
+
+    @staticmethod
+    def _new_generation():
+        return uuid.uuid4().hex
+
+    def cache_key(self, **kwargs):
+        lookup = repr(sorted(kwargs.items())).encode()
+        return f'blog:post:{self.generation()}:{hashlib.md5(lookup).hexdigest()}'
+
+    def get(self, *args, **kwargs):
+        if args:
+            # Q objects are not cached
+            return super().get(*args, **kwargs)
+        key = self.cache_key(**kwargs)
+        row = cache.get(key)
+        if row is None:
+            row = self._fetch_row(**kwargs)
+            cache.set(key, row, self.timeout)
+        return self._build(row)
+
+    def _fetch_row(self, **kwargs):
+        post = self.get_queryset().select_related('author').get(**kwargs)
+        author = post.author
+        return {
+            'post': {f.attname: getattr(post, f.attname)
+                     for f in post._meta.concrete_fields},
+            'author': {'id': author.id,
+                       'username': author.username,
+                       'first_name': author.first_name,
+                       'last_name': author.last_name},
+            'tags': list(post.tags.values_list('id', 'name')),
+        }
+
+    def _build(self, row):
+        db = router.db_for_read(self.model)
+        post = self.model.from_db(db, list(row['post']), list(row['post'].values()))
+        post.author = User.from_db(db, list(row['author']), list(row['author'].values()))
+        post.tag_ids = [tag_id for tag_id, _ in row['tags']]
+        post.tag_names = [name for _, name in row['tags']]
+        return post
+
+
 class Post(models.Model):
     class Status(models.TextChoices):
         DRAFT = 'DF', 'Draft'
@@ -29,11 +93,18 @@ class Post(models.Model):
     status = models.CharField(max_length=2,
                               choices=Status.choices,
                               default=Status.DRAFT)
+    views = models.PositiveIntegerField(default=0, editable=False)
+    # Comments moved to ArchivedComment, kept so comment counts stay complete
+    archived_comments_count = models.PositiveIntegerField(default=0, editable=False)
 
     objects = models.Manager()  # Te default manager
     published = PublishedManager()  # Our custom manager
+    cached = CachedPostManager()  # Cache-aware manager for single lookups
     tags = TaggableManager()  # Taggit's manager
 
+    # Only changed with F() updates, see ViewCounter and archive_comments
+    counter_fields = ('views', 'archived_comments_count')
+
     class Meta:
         ordering = ['-publish']
         indexes = [
@@ -43,6 +114,15 @@ class Post(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # A full save of an instance loaded earlier would undo counter updates made since
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key
+                                       and field.name not in self.counter_fields]
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog:post_detail',
                        args=[self.publish.year,
@@ -50,6 +130,16 @@ class Post(models.Model):
                              self.publish.day,
                              self.slug])
 
+    def active_comments(self):
+        """
+        Active comments oldest first, including the archived ones.
+        Use this rather than `comments`, which only holds comments that are not archived.
+        """
+        # A recent comment can be archived while inactive and reactivated later
+        comments = list(self.archived_comments.filter(active=True)) + \
+            list(self.comments.filter(active=True))
+        return sorted(comments, key=lambda comment: (comment.created, comment.id))
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post,
@@ -70,3 +160,32 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment by {self.name} on {self.post}"
+
+
+class ArchivedComment(models.Model):
+    """
+    Cold storage for comments that are inactive or old.
+    Rows keep the id they had in Comment; see the archive_comments command.
+    Archived rows are not part of `post.comments`. Read a post's comments through
+    `post.active_comments()`, or `post.archived_comments` for the archive alone.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='archived_comments')
+    name = models.CharField(max_length=80)
+    email = models.EmailField()
+    body = models.TextField()
+    created = models.DateTimeField()
+    updated = models.DateTimeField()
+    active = models.BooleanField(default=True)
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(fields=['created']),
+        ]
+
+    def __str__(self):
+        return f"Archived comment by {self.name} on {self.post}"
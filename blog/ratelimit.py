@@ -0,0 +1,147 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class HttpResponseTooManyRequests(HttpResponse):
+    status_code = 429
+
+
+def parse_rate(rate):
+    """ Turn '5/m' into (capacity, period in seconds). """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_key(request, key='ip'):
+    """
+    Identify the client by session or IP address.
+    The address is REMOTE_ADDR unless settings.BLOG_RATE_LIMIT_TRUSTED_PROXIES
+    says how many proxies append to X-Forwarded-For. Only the entries those
+    proxies added are read, since clients can send the header themselves.
+    """
+    if key == 'session':
+        session = getattr(request, 'session', None)
+        if session is not None and session.session_key:
+            return f'session:{session.session_key}'
+    return f'ip:{client_ip(request)}'
+
+
+def client_ip(request):
+    proxies = getattr(settings, 'BLOG_RATE_LIMIT_TRUSTED_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if proxies and forwarded:
+        entries = [entry.strip() for entry in forwarded.split(',')]
+        # The outermost proxy's entry is the client, e.g. the last one behind a single proxy
+        return entries[-min(proxies, len(entries))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class RateLimiter:
+    """
+    Token buckets, one per (scope, client).
+    A bucket holds up to `capacity` tokens and refills at capacity/period
+    tokens per second; each request takes one token.
+    Buckets live in process memory unless a cache alias is given, in which
+    case they are shared between processes. The cache variant is
+    read-modify-write and may let a few extra requests through under
+    concurrent access.
+    Local buckets are capped at `max_buckets`; the least recently used one is
+    dropped first, which only gives that client a fresh bucket.
+    """
+    max_buckets = 10000
+
+    def __init__(self, cache_alias=None):
+        self.cache_alias = cache_alias
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, scope, ident, rate):
+        """ Take a token. Return 0 if allowed, else seconds until a retry can succeed. """
+        capacity, period = parse_rate(rate)
+        if self.cache_alias:
+            return self._consume_shared(f'blog:ratelimit:{scope}:{ident}', capacity, period)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop((scope, ident), None)
+            if bucket is None and len(self._buckets) >= self.max_buckets:
+                self._buckets.popitem(last=False)
+            self._buckets[(scope, ident)], retry_after = self._take(bucket, capacity, period, now)
+        return retry_after
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def _consume_shared(self, key, capacity, period):
+        cache = caches[self.cache_alias]
+        now = time.time()
+        tokens, retry_after = self._take(cache.get(key), capacity, period, now)
+        cache.set(key, tokens, period)
+        return retry_after
+
+    @staticmethod
+    def _take(bucket, capacity, period, now):
+        """ Return the new bucket (tokens, timestamp, capacity, period) and the retry delay. """
+        refill = capacity / period
+        tokens = capacity if bucket is None else \
+            min(capacity, bucket[0] + (now - bucket[1]) * refill)
+        if tokens >= 1:
+            return (tokens - 1, now, capacity, period), 0
+        return (tokens, now, capacity, period), (1 - tokens) / refill
+
+
+limiter = RateLimiter(getattr(settings, 'BLOG_RATE_LIMIT_CACHE', None))
+
+
+def _limited(retry_after):
+    response = HttpResponseTooManyRequests('Too many requests.', content_type='text/plain')
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def ratelimit(rate, key='ip', scope=None):
+    """ Limit a view to `rate` requests ('5/m') per client. """
+    def decorator(view_func):
+        view_scope = scope or view_func.__name__
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            retry_after = limiter.consume(view_scope, client_key(request, key), rate)
+            if retry_after:
+                return _limited(retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """
+    Apply the limits in settings.BLOG_RATE_LIMITS, keyed by URL name:
+        {'blog:post_search': {'rate': '30/m', 'key': 'ip'}}
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        limit = getattr(settings, 'BLOG_RATE_LIMITS', {}).get(match.view_name)
+        if limit is None:
+            return None
+        retry_after = limiter.consume(match.view_name,
+                                      client_key(request, limit.get('key', 'ip')),
+                                      limit['rate'])
+        if retry_after:
+            return _limited(retry_after)
+        return None
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from .models import Post, ArchivedComment
+from .suggest import suggestions
+
+
+def bump_generation(post_id=None, tags=True):
+    """ Invalidate cached post rows and hand the change to the suggestion index. """
+    previous = Post.cached.generation()
+    suggestions.update(previous, Post.cached.bump_generation(), post_id=post_id, tags=tags)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_post_cache(sender, **kwargs):
+    """ Any change to a post or a tag makes cached post rows stale. """
+    bump_generation(post_id=kwargs['instance'].id if sender is Post else None)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_cache_on_tag_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_generation()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_post_cache_on_author_change(sender, update_fields=None, **kwargs):
+    """ Cached post rows hold their author's names. """
+    # Logins only update last_login, which is not cached
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # Suggestions hold no author fields
+    bump_generation(tags=False)
+
+
+@receiver(post_delete, sender=ArchivedComment)
+def decrement_archived_comments_count(sender, instance, **kwargs):
+    Post.objects.filter(id=instance.post_id, archived_comments_count__gt=0) \
+        .update(archived_comments_count=F('archived_comments_count') - 1)
@@ -0,0 +1,177 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.db.models import Count
+from django.urls import reverse
+
+from .models import Post
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall(text.casefold()))
+
+
+def word_keys(text):
+    """ Keys for every word position, so any word of a title can start a match. """
+    words = normalize(text).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class SuggestionIndex:
+    """
+    In-process prefix index over published post titles and tag names.
+    Keys live in a sorted list, so a prefix lookup is a bisect followed by
+    a scan of the matching range.
+    The index is built on first use and then updated from model signals.
+    It remembers the Post.cached generation it is in sync with and is rebuilt
+    when another process has bumped it.
+    """
+    orders = ('recent', 'popular')
+    max_results = 10
+    max_cached_queries = 512
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []  # sorted (key, kind, id)
+        self._items = {}  # (kind, id) -> item
+        self._queries = OrderedDict()  # popular query results, LRU
+        self.generation = None
+
+    @property
+    def built(self):
+        return self.generation is not None
+
+    def build(self):
+        with self._lock:
+            self._keys = []
+            self._items = {}
+            for row in Post.published.values('id', 'title', 'slug', 'publish', 'views'):
+                self._keys.extend(self._add_post(row))
+            self._keys.extend(self._add_tags())
+            self._keys.sort()
+            self._queries.clear()
+            self.generation = Post.cached.generation()
+
+    def suggest(self, query, order='recent', limit=5):
+        """ Top `limit` posts and tags whose title or name has a word starting with query. """
+        prefix = normalize(query)
+        limit = max(1, min(limit, self.max_results))
+        if not prefix:
+            return {'posts': [], 'tags': []}
+        with self._lock:
+            if self.generation != Post.cached.generation():
+                self.build()
+            cache_key = (prefix, order, limit)
+            if cache_key in self._queries:
+                self._queries.move_to_end(cache_key)
+                return self._queries[cache_key]
+            matches = set()
+            i = bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+                matches.add(self._keys[i][1:])
+                i += 1
+            score = 'score' if order == 'recent' else 'views'
+            result = {}
+            for kind in ('posts', 'tags'):
+                items = [self._items[match] for match in matches if match[0] == kind]
+                result[kind] = [{'label': item['label'], 'url': item['url']}
+                                for item in heapq.nlargest(limit, items,
+                                                           key=lambda item: item[score])]
+            self._queries[cache_key] = result
+            if len(self._queries) > self.max_cached_queries:
+                self._queries.popitem(last=False)
+            return result
+
+    def update(self, previous, generation, post_id=None, tags=True):
+        """
+        Apply a change made by this process, which bumped the Post.cached
+        generation from `previous` to `generation`: re-index one saved or
+        deleted post and, with `tags`, all tags, whose counts change with any
+        tagging. An index that missed a bump of another process stays stale
+        and is rebuilt on next use.
+        """
+        if not self.built:
+            return
+        with self._lock:
+            if self.generation != previous:
+                return
+            if post_id is not None:
+                self._remove(('posts', post_id))
+                row = Post.published.filter(id=post_id) \
+                    .values('id', 'title', 'slug', 'publish', 'views').first()
+                if row is not None:
+                    for key in self._add_post(row):
+                        insort(self._keys, key)
+            if tags:
+                for item in [item for ident, item in self._items.items() if ident[0] == 'tags']:
+                    self._remove(item['ident'])
+                for key in self._add_tags():
+                    insort(self._keys, key)
+            self._queries.clear()
+            self.generation = generation
+
+    def add_views(self, counts):
+        """
+        Add flushed view counts (post id -> views) so the popular order follows
+        ViewCounter, whose bulk UPDATE sends no signal.
+        """
+        if not self.built:
+            return
+        with self._lock:
+            for post_id, count in counts.items():
+                item = self._items.get(('posts', post_id))
+                if item is not None:
+                    item['views'] += count
+            self._queries.clear()
+
+    def _add_post(self, row):
+        """ Register a post item and return its keys, which the caller inserts. """
+        publish = row['publish']
+        ident = ('posts', row['id'])
+        keys = [(key, *ident) for key in word_keys(row['title'])]
+        self._items[ident] = {
+            'ident': ident,
+            'label': row['title'],
+            'url': reverse('blog:post_detail',
+                           args=[publish.year, publish.month, publish.day, row['slug']]),
+            'score': publish.timestamp(),
+            'views': row['views'],
+            'keys': keys,
+        }
+        return keys
+
+    def _add_tags(self):
+        rows = Post.published.exclude(tags=None).values('tags__id', 'tags__name', 'tags__slug') \
+            .annotate(posts=Count('id'))
+        added = []
+        for row in rows:
+            ident = ('tags', row['tags__id'])
+            keys = [(key, *ident) for key in word_keys(row['tags__name'])]
+            self._items[ident] = {
+                'ident': ident,
+                'label': row['tags__name'],
+                'url': reverse('blog:post_list_by_tag', args=[row['tags__slug']]),
+                # Tags rank by how many posts use them for both orders
+                'score': row['posts'],
+                'views': row['posts'],
+                'keys': keys,
+            }
+            added.extend(keys)
+        return added
+
+    def _remove(self, ident):
+        item = self._items.pop(ident, None)
+        if item is None:
+            return
+        for key in item['keys']:
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+
+suggestions = SuggestionIndex()
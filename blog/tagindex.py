@@ -0,0 +1,90 @@
+import heapq
+
+from django.core.cache import cache
+from taggit.models import Tag
+
+from .models import Post
+
+
+class TagIndex:
+    """
+    Posting lists of published posts per tag, kept in the cache.
+    Each list holds (publish timestamp, post id) pairs, newest first, so
+    lists can be intersected or merged in memory without touching the
+    taggit through table. The keys share the Post.cached generation, which
+    is bumped whenever a post, a tag or a post's tags change.
+    """
+    timeout = 60 * 60
+
+    def _key(self, generation, name):
+        return f'blog:tagindex:{generation}:{name}'
+
+    def build(self, generation):
+        """ Rebuild every posting list and the tag cloud with one query. """
+        postings = {}
+        names = {}
+        rows = Post.published.exclude(tags=None) \
+            .values_list('tags__slug', 'tags__name', 'publish', 'id')
+        for slug, name, publish, post_id in rows:
+            postings.setdefault(slug, []).append((publish.timestamp(), post_id))
+            names[slug] = name
+        for posting in postings.values():
+            posting.sort(reverse=True)
+        cloud = sorted(({'name': names[slug], 'slug': slug, 'count': len(posting)}
+                        for slug, posting in postings.items()),
+                       key=lambda tag: tag['name'].lower())
+        values = {self._key(generation, f'tag:{slug}'): posting
+                  for slug, posting in postings.items()}
+        values[self._key(generation, 'cloud')] = cloud
+        cache.set_many(values, self.timeout)
+        return postings, cloud
+
+    def cloud(self):
+        """ Tags with their number of published posts, by name. """
+        generation = Post.cached.generation()
+        cloud = cache.get(self._key(generation, 'cloud'))
+        if cloud is None:
+            _, cloud = self.build(generation)
+        return cloud
+
+    def lookup(self, slugs):
+        """
+        Return the tags (name and slug) and posting lists for slugs.
+        Raises Tag.DoesNotExist if a tag is unknown.
+        """
+        generation = Post.cached.generation()
+        keys = [self._key(generation, f'tag:{slug}') for slug in slugs]
+        found = cache.get_many(keys + [self._key(generation, 'cloud')])
+        cloud = found.get(self._key(generation, 'cloud'))
+        known = {tag['slug'] for tag in cloud} if cloud is not None else set()
+        if cloud is None or any(slug in known and key not in found
+                                for slug, key in zip(slugs, keys)):
+            postings, cloud = self.build(generation)
+            found = {key: postings.get(slug, []) for slug, key in zip(slugs, keys)}
+        tags = {tag['slug']: tag for tag in cloud}
+        missing = [slug for slug in slugs if slug not in tags]
+        if missing:
+            # Tags without published posts are not in the index
+            for tag in Tag.objects.filter(slug__in=missing).values('name', 'slug'):
+                tags[tag['slug']] = dict(tag, count=0)
+            if any(slug not in tags for slug in missing):
+                raise Tag.DoesNotExist
+        return ([tags[slug] for slug in slugs],
+                [found.get(key, []) for key in keys])
+
+    def post_ids(self, postings, match_all):
+        """ Post ids newest first, in all (AND) or any (OR) of the postings. """
+        if match_all:
+            postings = sorted(postings, key=len)
+            others = [set(posting) for posting in postings[1:]]
+            merged = [entry for entry in postings[0]
+                      if all(entry in other for other in others)]
+        else:
+            merged = []
+            for entry in heapq.merge(*postings, reverse=True):
+                if not merged or merged[-1] != entry:
+                    merged.append(entry)
+        return [post_id for _, post_id in merged]
+
+
+tag_index = TagIndex()
@@ -1,9 +1,10 @@
-import markdown
 from django import template
 from django.utils.safestring import mark_safe
 
+from ..counters import view_counter
 from ..models import Post
-from django.db.models import Count
+from ..tagindex import tag_index
+from django.db.models import Count, F
 
 register = template.Library()
 
@@ -22,10 +23,22 @@ def show_latest_posts(count=5):
 @register.simple_tag
 def get_most_commented_post(count=5):
     return Post.published.annotate(
-        total_comments=Count('comments')
+        total_comments=Count('comments') + F('archived_comments_count')
     ).order_by('-total_comments')[:count]
 
 
+@register.simple_tag
+def get_most_read_posts(count=5):
+    return view_counter.ranking(count)
+
+
+@register.simple_tag
+def get_tag_cloud():
+    return tag_index.cloud()
+
+
 @register.filter(name='markdown')
 def markdown_format(text):
+    # Imported on first use to keep worker startup light
+    import markdown
     return mark_safe(markdown.markdown(text))
@@ -1,17 +1,57 @@
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
 import markdown
+from django.contrib import admin
 from django.contrib.auth.models import User
 from django.template.defaultfilters import truncatewords_html
-from django.test import TestCase, RequestFactory
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from taggit.models import Tag
 
+from . import api
+from .counters import ViewCounter, view_counter
+from .management.commands.benchmark_startup import Command as BenchmarkStartupCommand
 from .feeds import LatestPostsFeed
 from .forms import CommentForm, SearchForm, EmailPostForm
-from .models import Post
+from .models import Post, Comment, ArchivedComment
+from .ratelimit import RateLimiter, client_key, limiter, ratelimit
 from .sitemaps import PostSitemap
+from .suggest import SuggestionIndex, suggestions
+from .tagindex import tag_index
+from .templatetags.blog_tags import get_most_read_posts, get_most_commented_post
 from .views import post_list, post_detail, post_share, post_comment, post_search
 
+# Tests get their own shared cache so they never read or clear the deployment's one
+TEST_CACHE_DIR = tempfile.TemporaryDirectory()
+test_cache = override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': TEST_CACHE_DIR.name,
+    }
+})
+
+
+def setUpModule():
+    test_cache.enable()
+    # Views of the shared counter would be flushed at exit, after the test database is gone
+    view_counter.enabled = False
+
+
+def tearDownModule():
+    view_counter.enabled = True
+    view_counter.discard()
+    test_cache.disable()
+    TEST_CACHE_DIR.cleanup()
+
 
 class BlogViewTestCase(TestCase):
     def setUp(self):
@@ -150,3 +190,564 @@ class SiteMapsTestCase(TestCase):
         sitemap = PostSitemap()
         for post in self.posts[::-1]:
             self.assertEqual(sitemap.lastmod(post), post.updated)
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.posts = [
+            Post.objects.create(title=f'Test Post {i}', slug=f'test-post-{i}', body='Test Body', author=self.user,
+                                status='PB', publish=timezone.now())
+            for i in range(5)
+        ]
+        self.posts[0].tags.add('django', 'python')
+        self.draft = Post.objects.create(title='Draft', slug='draft', body='Draft Body', author=self.user)
+        Comment.objects.create(post=self.posts[0], name='Name', email='a@b.com', body='Hi')
+        Comment.objects.create(post=self.posts[0], name='Hidden', email='a@b.com', body='Hi', active=False)
+
+    def test_post_list(self):
+        response = self.client.get(reverse('blog:api_post_list'))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([p['id'] for p in data['results']], [p.id for p in self.posts[::-1]])
+        self.assertEqual(data['results'][-1]['tags'], ['django', 'python'])
+        self.assertEqual(data['results'][-1]['url'], self.posts[0].get_absolute_url())
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields(self):
+        response = self.client.get(reverse('blog:api_post_list'), {'fields': 'title,author'})
+
+        self.assertEqual(response.json()['results'][0], {'title': 'Test Post 4', 'author': 'testuser'})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('blog:api_post_list'), {'fields': 'title,password'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        seen = []
+        url = reverse('blog:api_post_list') + '?limit=2&fields=id'
+        while url:
+            data = self.client.get(url).json()
+            seen += [p['id'] for p in data['results']]
+            url = data['next']
+        self.assertEqual(seen, [p.id for p in self.posts[::-1]])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('blog:api_post_list'), {'cursor': 'nope'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag(self):
+        response = self.client.get(reverse('blog:api_post_list'))
+        cached = self.client.get(reverse('blog:api_post_list'), HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(cached.status_code, 304)
+
+    def test_post_detail(self):
+        response = self.client.get(reverse('blog:api_post_detail', args=[self.posts[0].id]))
+
+        self.assertEqual(response.json()['body'], 'Test Body')
+        self.assertEqual(response.json()['tags'], ['django', 'python'])
+
+    def test_draft_not_found(self):
+        response = self.client.get(reverse('blog:api_post_detail', args=[self.draft.id]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_list(self):
+        response = self.client.get(reverse('blog:api_comment_list', args=[self.posts[0].id]))
+
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(set(results[0]), set(api.COMMENT_FIELDS))
+
+    def test_tag_list(self):
+        response = self.client.get(reverse('blog:api_tag_list'))
+
+        self.assertEqual(response.json()['results'], [
+            {'name': 'django', 'slug': 'django', 'posts': 1},
+            {'name': 'python', 'slug': 'python', 'posts': 1},
+        ])
+
+
+class PostCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.post = Post.objects.create(title='Test Post', slug='test-post', body='Test Body', author=self.user,
+                                        status='PB', publish=timezone.now())
+        self.post.tags.add('django')
+
+    def test_read_through(self):
+        post = Post.cached.get(id=self.post.id)
+        with self.assertNumQueries(0):
+            cached = Post.cached.get(id=self.post.id)
+            self.assertEqual(cached, post)
+            self.assertEqual(cached.title, 'Test Post')
+            self.assertEqual(str(cached.author), 'testuser')
+            self.assertEqual(cached.tag_names, ['django'])
+
+    def test_missing_post(self):
+        with self.assertRaises(Post.DoesNotExist):
+            Post.cached.get(id=self.post.id + 1)
+
+    def test_save_bumps_generation(self):
+        Post.cached.get(id=self.post.id)
+        self.post.title = 'New Title'
+        self.post.save()
+
+        self.assertEqual(Post.cached.get(id=self.post.id).title, 'New Title')
+
+    def test_tag_change_bumps_generation(self):
+        Post.cached.get(id=self.post.id)
+        self.post.tags.add('python')
+
+        self.assertEqual(Post.cached.get(id=self.post.id).tag_names, ['django', 'python'])
+
+    def test_evicted_generation(self):
+        Post.cached.get(id=self.post.id)
+        self.post.title = 'New Title'
+        self.post.save()
+        cache.delete(Post.cached.generation_key)
+
+        self.assertEqual(Post.cached.get(id=self.post.id).title, 'New Title')
+
+    def test_author_change_bumps_generation(self):
+        Post.cached.get(id=self.post.id)
+        self.user.username = 'renamed'
+        self.user.save()
+
+        self.assertEqual(Post.cached.get(id=self.post.id).author.username, 'renamed')
+
+    def test_login_keeps_generation(self):
+        generation = Post.cached.generation()
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+
+        self.assertEqual(Post.cached.generation(), generation)
+
+    def test_delete_bumps_generation(self):
+        post_id = self.post.id
+        Post.cached.get(id=post_id)
+        self.post.delete()
+
+        with self.assertRaises(Post.DoesNotExist):
+            Post.cached.get(id=post_id)
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                  'LOCATION': location}}
+            with override_settings(CACHES=caches):
+                post = Post.cached.get(id=self.post.id)
+                with self.assertNumQueries(0):
+                    self.assertEqual(Post.cached.get(id=self.post.id).author.username, 'testuser')
+                self.post.tags.add('python')
+                self.assertEqual(Post.cached.get(id=post.id).tag_names, ['django', 'python'])
+                self.post.title = 'New Title'
+                self.post.save()
+                cache.delete(Post.cached.generation_key)
+                self.assertEqual(Post.cached.get(id=post.id).title, 'New Title')
+
+
+class ViewCounterTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.counter = ViewCounter()
+        self.addCleanup(self.counter.discard)
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.posts = [
+            Post.objects.create(title=f'Test Post {i}', slug=f'test-post-{i}', body='Test Body', author=self.user,
+                                status='PB', publish=timezone.now())
+            for i in range(3)
+        ]
+
+    def test_hits_are_buffered(self):
+        with self.assertNumQueries(0):
+            self.counter.hit(self.posts[0].id)
+            self.counter.hit(self.posts[0].id)
+
+        self.assertEqual(self.counter.pending(), {self.posts[0].id: 2})
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 0)
+
+    def test_flush_single_update(self):
+        for post, hits in zip(self.posts, [1, 3, 2]):
+            for _ in range(hits):
+                self.counter.hit(post.id)
+        # One UPDATE for the batch plus one SELECT for the ranking
+        with self.assertNumQueries(2):
+            self.counter.flush()
+
+        self.assertEqual([p.views for p in Post.objects.order_by('id')], [1, 3, 2])
+        self.assertEqual(self.counter.pending(), {})
+
+    def test_disabled(self):
+        self.counter.enabled = False
+        self.counter.hit(self.posts[0].id)
+
+        self.assertEqual(self.counter.pending(), {})
+
+    def test_flush_skips_other_database(self):
+        self.counter.hit(self.posts[0].id)
+        # e.g. the test database was torn down before the exit flush
+        with mock.patch.object(ViewCounter, '_database_name', return_value='other.sqlite3'), \
+                self.assertNumQueries(0):
+            self.assertEqual(self.counter.flush(), 0)
+
+        self.assertEqual(self.counter.pending(), {})
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 0)
+
+    def test_save_keeps_counters(self):
+        stale = Post.objects.get(id=self.posts[0].id)
+        self.counter.hit(stale.id)
+        self.counter.flush()
+        Post.objects.filter(id=stale.id).update(archived_comments_count=2)
+        stale.title = 'Edited'
+        stale.save()
+
+        post = Post.objects.get(id=stale.id)
+        self.assertEqual((post.title, post.views, post.archived_comments_count), ('Edited', 1, 2))
+
+    def test_threshold_flush(self):
+        self.counter.flush_threshold = 2
+        self.counter.hit(self.posts[0].id)
+        self.counter.hit(self.posts[0].id)
+
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 2)
+
+    def test_interval_flush_without_hits(self):
+        self.counter.flush_interval = 0.01
+        flushed = threading.Event()
+        with mock.patch.object(self.counter, 'flush', side_effect=flushed.set):
+            self.counter.hit(self.posts[0].id)
+
+            self.assertTrue(flushed.wait(5))
+
+    def test_flush_cancels_timer(self):
+        self.counter.hit(self.posts[0].id)
+        timer = self.counter._timer
+        self.counter.flush()
+
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+
+    def test_ranking_without_queries(self):
+        self.counter.hit(self.posts[1].id)
+        self.counter.hit(self.posts[1].id)
+        self.counter.hit(self.posts[2].id)
+        self.counter.flush()
+
+        with self.assertNumQueries(0):
+            ranking = self.counter.ranking(5)
+            self.assertEqual(get_most_read_posts(5), ranking)
+        self.assertEqual([p['id'] for p in ranking], [self.posts[1].id, self.posts[2].id])
+        self.assertEqual(ranking[0]['url'], self.posts[1].get_absolute_url())
+
+
+class WarmCacheTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.posts = [
+            Post.objects.create(title=f'Test Post {i}', slug=f'test-post-{i}', body='Test Body', author=self.user,
+                                status='PB', publish=timezone.now())
+            for i in range(4)
+        ]
+        self.posts[0].tags.add('django', 'python')
+        for post in [self.posts[0], self.posts[0], self.posts[3]]:
+            Comment.objects.create(post=post, name='Name', email='a@b.com', body='Hi')
+
+    def test_warm_cache(self):
+        out = StringIO()
+        call_command('warm_cache', pages=2, posts=2, workers=2, stdout=out, stderr=StringIO())
+
+        output = out.getvalue()
+        # 2 list pages, 2 tag pages, 3 distinct newest/most commented posts, feed and sitemap
+        self.assertIn('tags       2/2', output)
+        self.assertIn('Warmed 9/9 URLs', output)
+        self.assertIn('3/4 published posts covered', output)
+        self.assertEqual(Post.objects.filter(views__gt=0).count(), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_refuses_per_process_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('warm_cache', stdout=StringIO())
+
+
+class StartupTestCase(TestCase):
+    def test_parse_importtime(self):
+        output = ('import time: self [us] | cumulative | imported package\n'
+                  'import time:       100 |        100 |   markdown.util\n'
+                  'import time:       200 |        300 | markdown\n'
+                  'import time:        50 |         50 | blog.views\n')
+
+        self.assertEqual(BenchmarkStartupCommand.parse_importtime(output), {'markdown': 300, 'blog.views': 50})
+
+    def test_preload(self):
+        from config.preload import LAZY_MODULES, preload
+        with mock.patch.dict(sys.modules):
+            for module in LAZY_MODULES:
+                sys.modules.pop(module, None)
+            preload()
+
+            for module in LAZY_MODULES:
+                self.assertIn(module, sys.modules)
+
+
+class RateLimitTestCase(TestCase):
+    def setUp(self):
+        limiter.reset()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        limiter.reset()
+
+    def test_bucket(self):
+        bucket = RateLimiter()
+        self.assertEqual(bucket.consume('scope', 'client', '2/m'), 0)
+        self.assertEqual(bucket.consume('scope', 'client', '2/m'), 0)
+        self.assertAlmostEqual(bucket.consume('scope', 'client', '2/m'), 30, delta=1)
+        self.assertEqual(bucket.consume('scope', 'other', '2/m'), 0)
+
+    def test_bucket_cap(self):
+        bucket = RateLimiter()
+        bucket.max_buckets = 3
+        for i in range(5):
+            bucket.consume('scope', f'client-{i}', '1/m')
+        # The least recently used clients were dropped
+        self.assertEqual(list(bucket._buckets), [('scope', 'client-2'), ('scope', 'client-3'), ('scope', 'client-4')])
+        self.assertGreater(bucket.consume('scope', 'client-4', '1/m'), 0)
+        self.assertEqual(bucket.consume('scope', 'client-0', '1/m'), 0)
+
+    def test_shared_bucket(self):
+        cache.clear()
+        first, second = RateLimiter('default'), RateLimiter('default')
+        self.assertEqual(first.consume('scope', 'client', '1/m'), 0)
+        self.assertGreater(second.consume('scope', 'client', '1/m'), 0)
+
+    def test_decorator(self):
+        view = ratelimit('1/h')(lambda request: HttpResponse('ok'))
+        self.assertEqual(view(self.factory.get('/')).status_code, 200)
+        response = view(self.factory.get('/'))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3600')
+
+    @override_settings(BLOG_RATE_LIMITS={'blog:post_search': {'rate': '2/m', 'key': 'ip'}})
+    def test_middleware(self):
+        url = reverse('blog:post_search')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 200)
+        self.assertEqual(self.client.get(reverse('blog:post_list')).status_code, 200)
+
+
+    def test_client_key_behind_proxies(self):
+        request = self.factory.get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4')
+        self.assertEqual(client_key(request), 'ip:10.0.0.1')
+
+        with override_settings(BLOG_RATE_LIMIT_TRUSTED_PROXIES=1):
+            self.assertEqual(client_key(request), 'ip:1.2.3.4')
+            self.assertEqual(client_key(self.factory.get('/', REMOTE_ADDR='10.0.0.1')), 'ip:10.0.0.1')
+        with override_settings(BLOG_RATE_LIMIT_TRUSTED_PROXIES=2):
+            self.assertEqual(client_key(request), 'ip:6.6.6.6')
+
+
+class ArchiveCommentsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.post = Post.objects.create(title='Test Post', slug='test-post', body='Test Body', author=self.user,
+                                        status='PB', publish=timezone.now())
+        self.old = Comment.objects.create(post=self.post, name='Old', email='a@b.com', body='Old')
+        self.inactive = Comment.objects.create(post=self.post, name='Inactive', email='a@b.com', body='Hidden',
+                                               active=False)
+        self.recent = Comment.objects.create(post=self.post, name='Recent', email='a@b.com', body='Recent')
+        Comment.objects.filter(id=self.old.id).update(created=timezone.now() - timedelta(days=400))
+
+    def test_archive(self):
+        call_command('archive_comments', days=365, batch_size=1, stdout=StringIO())
+
+        self.assertEqual(list(self.post.comments.all()), [self.recent])
+        self.assertEqual(set(self.post.archived_comments.values_list('id', flat=True)), {self.old.id, self.inactive.id})
+
+    def test_most_commented_counts_archive(self):
+        other = Post.objects.create(title='Other Post', slug='other-post', body='Test Body', author=self.user,
+                                    status='PB', publish=timezone.now())
+        for _ in range(2):
+            Comment.objects.create(post=other, name='Name', email='a@b.com', body='Hi')
+        call_command('archive_comments', days=365, stdout=StringIO())
+
+        ranking = list(get_most_commented_post())
+        self.assertEqual(ranking, [self.post, other])
+        self.assertEqual([p.total_comments for p in ranking], [3, 2])
+
+        ArchivedComment.objects.get(id=self.inactive.id).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.archived_comments_count, 1)
+
+    def test_admin_cannot_add_archived_comments(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser(username='admin', password='testpass')
+
+        self.assertFalse(admin.site._registry[ArchivedComment].has_add_permission(request))
+
+    def test_active_comments_include_archive(self):
+        call_command('archive_comments', days=365, stdout=StringIO())
+
+        self.assertEqual([c.name for c in self.post.active_comments()], ['Old', 'Recent'])
+
+    def test_reactivated_archived_comment_order(self):
+        late = Comment.objects.create(post=self.post, name='Late', email='a@b.com', body='Late', active=False)
+        call_command('archive_comments', days=365, stdout=StringIO())
+        ArchivedComment.objects.filter(id=late.id).update(active=True)
+
+        self.assertEqual([c.name for c in self.post.active_comments()], ['Old', 'Recent', 'Late'])
+
+    def test_detail_and_api_after_archive(self):
+        call_command('archive_comments', days=365, stdout=StringIO())
+        response = self.client.get(self.post.get_absolute_url())
+        data = self.client.get(reverse('blog:api_comment_list', args=[self.post.id]), {'limit': 1}).json()
+        second = self.client.get(data['next']).json()
+
+        self.assertContains(response, '2 comments')
+        self.assertEqual([c['name'] for c in data['results'] + second['results']], ['Old', 'Recent'])
+
+
+class TagIndexTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.posts = [
+            Post.objects.create(title=f'Test Post {i}', slug=f'test-post-{i}', body='Test Body', author=self.user,
+                                status='PB', publish=timezone.now() - timedelta(days=i))
+            for i in range(4)
+        ]
+        self.posts[0].tags.add('django', 'python')
+        self.posts[1].tags.add('django')
+        self.posts[2].tags.add('python')
+        self.posts[3].tags.add('django', 'python')
+        self.draft = Post.objects.create(title='Draft', slug='draft', body='Draft Body', author=self.user)
+        self.draft.tags.add('django')
+
+    def ids(self, *posts):
+        return [self.posts[i].id for i in posts]
+
+    def test_and_or(self):
+        tags, postings = tag_index.lookup(['django', 'python'])
+
+        self.assertEqual([tag['slug'] for tag in tags], ['django', 'python'])
+        self.assertEqual(tag_index.post_ids(postings, match_all=True), self.ids(0, 3))
+        self.assertEqual(tag_index.post_ids(postings, match_all=False), self.ids(0, 1, 2, 3))
+
+    def test_cached_lookup(self):
+        tag_index.lookup(['django'])
+        with self.assertNumQueries(0):
+            tag_index.lookup(['django', 'python'])
+
+    def test_unknown_tag(self):
+        with self.assertRaises(Tag.DoesNotExist):
+            tag_index.lookup(['django', 'unknown'])
+
+    def test_tag_change_updates_index(self):
+        tag_index.lookup(['python'])
+        self.posts[1].tags.add('python')
+        _, postings = tag_index.lookup(['python'])
+
+        self.assertEqual(tag_index.post_ids(postings, match_all=True), self.ids(0, 1, 2, 3))
+
+    def test_cloud(self):
+        self.assertEqual(tag_index.cloud(), [{'name': 'django', 'slug': 'django', 'count': 3},
+                                             {'name': 'python', 'slug': 'python', 'count': 3}])
+
+    def test_multi_tag_views(self):
+        response = self.client.get(reverse('blog:post_list_by_tag', args=['django+python']))
+        self.assertEqual(list(response.context['posts']), [self.posts[0], self.posts[3]])
+        self.assertContains(response, '"django" and')
+
+        response = self.client.get(reverse('blog:post_list_by_tag', args=['django,python']), {'page': 2})
+        self.assertEqual(list(response.context['posts']), [self.posts[3]])
+
+        self.assertEqual(self.client.get(reverse('blog:post_list_by_tag', args=['nope'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('blog:post_list_by_tag', args=['a+b,c'])).status_code, 404)
+
+
+class SuggestionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.older = Post.objects.create(title='Django Tips', slug='django-tips', body='Body', author=self.user,
+                                         status='PB', publish=timezone.now() - timedelta(days=1), views=10)
+        self.newer = Post.objects.create(title='Learning Django', slug='learning-django', body='Body',
+                                         author=self.user, status='PB', publish=timezone.now())
+        self.draft = Post.objects.create(title='Django Draft', slug='django-draft', body='Body', author=self.user)
+        self.older.tags.add('django')
+        self.index = SuggestionIndex()
+        self.index.build()
+
+    def titles(self, result):
+        return [item['label'] for item in result['posts']]
+
+    def test_prefix_and_order(self):
+        self.assertEqual(self.titles(self.index.suggest('dja')), ['Learning Django', 'Django Tips'])
+        self.assertEqual(self.titles(self.index.suggest('DJA', order='popular')), ['Django Tips', 'Learning Django'])
+        self.assertEqual(self.titles(self.index.suggest('learning d')), ['Learning Django'])
+        self.assertEqual(self.index.suggest('dja')['tags'], [{'label': 'django', 'url': '/blog/tag/django/'}])
+        self.assertEqual(self.index.suggest('  '), {'posts': [], 'tags': []})
+
+    def test_limit(self):
+        self.assertEqual(self.titles(self.index.suggest('dja', limit=1)), ['Learning Django'])
+
+    def test_popular_queries_cached(self):
+        result = self.index.suggest('tip')
+        self.assertIs(self.index.suggest('tip'), result)
+
+    def test_incremental_update(self):
+        suggestions.build()
+        self.assertEqual(self.titles(suggestions.suggest('dja')), ['Learning Django', 'Django Tips'])
+        self.draft.status = Post.Status.PUBLISHED
+        self.draft.save()
+        self.older.delete()
+
+        self.assertEqual(suggestions.generation, Post.cached.generation())
+        self.assertEqual(self.titles(suggestions.suggest('dja')), ['Django Draft', 'Learning Django'])
+        self.assertEqual(suggestions.suggest('dja')['tags'], [])
+
+    def test_popular_follows_view_flush(self):
+        suggestions.build()
+        self.assertEqual(self.titles(suggestions.suggest('dja', order='popular')), ['Django Tips', 'Learning Django'])
+        counter = ViewCounter()
+        for _ in range(11):
+            counter.hit(self.newer.id)
+        counter.flush()
+
+        self.assertEqual(self.titles(suggestions.suggest('dja', order='popular')), ['Learning Django', 'Django Tips'])
+
+    def test_rebuild_on_foreign_generation(self):
+        Post.objects.filter(id=self.newer.id).update(title='Renamed')
+        Post.cached.bump_generation()
+
+        self.assertEqual(self.titles(self.index.suggest('ren')), ['Renamed'])
+
+    def test_update_after_foreign_generation(self):
+        suggestions.build()
+        # Another process renames a post, this one then saves a different post
+        Post.objects.filter(id=self.newer.id).update(title='Renamed')
+        Post.cached.bump_generation()
+        self.older.save()
+
+        self.assertNotEqual(suggestions.generation, Post.cached.generation())
+        self.assertEqual(self.titles(suggestions.suggest('ren')), ['Renamed'])
+
+    def test_view(self):
+        response = self.client.get(reverse('blog:post_suggest'), {'query': 'tips'})
+
+        self.assertEqual(response.json()['posts'], [{'label': 'Django Tips', 'url': self.older.get_absolute_url()}])
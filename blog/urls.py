@@ -1,13 +1,14 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 from .feeds import LatestPostsFeed
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.post_list, name='post_list'),  # Function Based View
-    path('tag/<slug:tag_slug>/', views.post_list, name='post_list_by_tag'),  # Function Based View with tags
+    # Function Based View with tags, 'a+b' matches all tags and 'a,b' any of them
+    path('tag/<str:tag_slug>/', views.post_list, name='post_list_by_tag'),
     # path('', views.PostListView.as_view(), name='post_list'),  # Class Based View
     path('<int:year>/<int:month>/<int:day>/<slug:post>/', views.post_detail, name='post_detail'),
     path('<int:post_id>/share/', views.post_share, name='post_share'),
@@ -16,4 +17,10 @@ urlpatterns = [
     path('feed/', LatestPostsFeed(), name='post_feed'),
     # Search URL
     path('search/', views.post_search, name='post_search'),
+    path('search/suggest/', views.post_suggest, name='post_suggest'),
+    # JSON API URLs
+    path('api/posts/', api.post_list, name='api_post_list'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path('api/posts/<int:post_id>/comments/', api.comment_list, name='api_comment_list'),
+    path('api/tags/', api.tag_list, name='api_tag_list'),
 ]
@@ -1,13 +1,16 @@
-from django.contrib.postgres.search import TrigramSimilarity
 from django.core.mail import send_mail
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.db.models import Count
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from taggit.models import Tag
 
+from .counters import view_counter
 from .forms import EmailPostForm, CommentForm, SearchForm
 from .models import Post
+from .suggest import suggestions
+from .tagindex import tag_index
 
 
 # class PostListView(ListView):
@@ -33,12 +36,25 @@ from .models import Post
 
 
 def post_list(request, tag_slug=None):
-    """ List all published posts. """
-    tag = None
+    """
+    List all published posts.
+    tag_slug may combine several tags: 'a+b' lists posts with all of them,
+    'a,b' posts with any of them.
+    """
+    tags = []
+    match_all = True
     postlist = Post.published.all()
     if tag_slug:
-        tag = get_object_or_404(Tag, slug=tag_slug)
-        postlist = postlist.filter(tags__in=[tag])
+        match_all = ',' not in tag_slug
+        slugs = tag_slug.split('+' if match_all else ',')
+        if not all(slugs) or (not match_all and '+' in tag_slug):
+            raise Http404('Invalid tag filter.')
+        try:
+            tags, postings = tag_index.lookup(slugs)
+        except Tag.DoesNotExist:
+            raise Http404('No Tag matches the given query.')
+        # Ids of matching posts, the page is then fetched by primary key
+        postlist = tag_index.post_ids(postings, match_all)
     # Pagination with 3 posts per page
     paginator = Paginator(postlist, 3)
     page_number = request.GET.get('page', 1)
@@ -50,28 +66,33 @@ def post_list(request, tag_slug=None):
     except EmptyPage:
         # If page_number is out of range deliver last page of results
         posts = paginator.page(paginator.num_pages)
+    if tag_slug:
+        in_page = Post.published.in_bulk(posts.object_list)
+        posts.object_list = [in_page[pk] for pk in posts.object_list if pk in in_page]
     return render(request,
                   'blog/post/list.html',
                   {'posts': posts,
-                   'tag': tag})
+                   'tags': tags,
+                   'match_all': match_all})
 
 
 def post_detail(request, year, month, day, post):
     """ Display a single post. """
-    post = get_object_or_404(Post,
+    post = get_object_or_404(Post.cached,
                              status=Post.Status.PUBLISHED,
                              slug=post,
                              publish__year=year,
                              publish__month=month,
                              publish__day=day)
-    # List of active comments for this post
-    comments = post.comments.filter(active=True)
+    # Count the view, written to the database in batches
+    view_counter.hit(post.id)
+    # List of active comments for this post, archived ones included
+    comments = post.active_comments()
     # Form for users to comment
     form = CommentForm()
 
     # List of similar posts
-    post_tags_id = post.tags.values_list('id', flat=True)
-    similar_posts = Post.published.filter(tags__in=post_tags_id).exclude(id=post.id)
+    similar_posts = Post.published.filter(tags__in=post.tag_ids).exclude(id=post.id)
     similar_posts = similar_posts.annotate(same_tags=Count('tags')).order_by('-same_tags')[:4]
 
     return render(request,
@@ -84,7 +105,7 @@ def post_detail(request, year, month, day, post):
 
 def post_share(request, post_id):
     # Retrieve post by id
-    post = get_object_or_404(Post,
+    post = get_object_or_404(Post.cached,
                              id=post_id,
                              status=Post.Status.PUBLISHED)
     sent = False
@@ -117,7 +138,7 @@ def post_share(request, post_id):
 
 @require_POST
 def post_comment(request, post_id):
-    post = get_object_or_404(Post,
+    post = get_object_or_404(Post.cached,
                              id=post_id,
                              status=Post.Status.PUBLISHED)
     comment = None
@@ -144,6 +165,8 @@ def post_search(request):
         form = SearchForm(request.GET)
         if form.is_valid():
             query = form.cleaned_data['query']
+            # Imported here to keep worker startup light
+            from django.contrib.postgres.search import TrigramSimilarity
             results = Post.published.annotate(
                 similarity=TrigramSimilarity('title', query)).filter(similarity__gt=0.1).order_by('-similarity')
 
@@ -153,3 +176,17 @@ def post_search(request):
                    'query': query,
                    'results': results}
                   )
+
+
+@require_GET
+def post_suggest(request):
+    """ Search-as-you-type suggestions for post titles and tags. """
+    query = request.GET.get('query', '')
+    order = request.GET.get('order', 'recent')
+    if order not in suggestions.orders:
+        order = 'recent'
+    try:
+        limit = int(request.GET.get('limit', 5))
+    except ValueError:
+        limit = 5
+    return JsonResponse(suggestions.suggest(query, order, limit))
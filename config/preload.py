@@ -0,0 +1,34 @@
+"""
+Optional preload hook for forking servers.
+
+Heavy dependencies of the blog are imported lazily so that a single worker
+starts fast. A pre-forking server (e.g. gunicorn with ``--preload``) can
+instead pay that cost once in the master process, before the workers are
+forked, by setting ``DJANGO_PRELOAD=1`` or calling ``preload()`` from its
+configuration.
+"""
+import importlib
+
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+LAZY_MODULES = [
+    'markdown',
+    'django.contrib.postgres.search',
+]
+
+TEMPLATES = [
+    'blog/post/list.html',
+    'blog/post/detail.html',
+    'blog/post/share.html',
+    'blog/post/search.html',
+]
+
+
+def preload():
+    """ Import lazy dependencies, the URLconf and compile the main templates. """
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+    get_resolver().url_patterns
+    for template in TEMPLATES:
+        get_template(template)
@@ -11,11 +11,13 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-load_dotenv()
+# Only load python-dotenv when there is a .env file to read
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
@@ -61,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.ratelimit.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -99,6 +102,42 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# The blog invalidates cached posts, tag lists and suggestions through a
+# generation key in this cache, so it must be shared by all workers.
+# A per-process backend (LocMemCache) only suits a single worker.
+# The file-based cache suits a single host. For production, Redis or Memcached
+# are the supported shared backends: they evict old generations' keys by LRU.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',  # Shared between processes
+        'LOCATION': os.getenv('CACHE_LOCATION', BASE_DIR / 'cache'),
+        # Room for a post row per lookup and a list per tag, over a few
+        # generations, before culling starts deleting random entries
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+        # 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',  # Per-process cache, single worker only
+        # 'BACKEND': 'django.core.cache.backends.redis.RedisCache',  # Production
+        # 'LOCATION': 'redis://127.0.0.1:6379',
+    }
+}
+
+
+# Rate limits for unauthenticated endpoints (key: 'ip' or 'session')
+
+BLOG_RATE_LIMITS = {
+    'blog:post_comment': {'rate': '5/m', 'key': 'ip'},
+    'blog:post_share': {'rate': '5/m', 'key': 'ip'},
+    'blog:post_search': {'rate': '30/m', 'key': 'ip'},
+    'blog:post_suggest': {'rate': '120/m', 'key': 'ip'},
+}
+BLOG_RATE_LIMIT_CACHE = None  # Cache alias to share buckets between processes, None keeps them per process
+# Number of reverse proxies in front of the site that append the client address to X-Forwarded-For,
+# 0 identifies clients by REMOTE_ADDR
+BLOG_RATE_LIMIT_TRUSTED_PROXIES = 0
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 